@@ -17,11 +17,19 @@ MODEL_URL = (
     "https://huggingface.co/ssec-uw/OLMo-7B-Instruct-GGUF/resolve/main/"
     "OLMo-7B-Instruct-Q4_K_M.gguf?download=true"
 )
+# None -> use the SHA-256 HuggingFace reports for the file (X-Linked-Etag), both
+# to verify a download and to check an already present model
+MODEL_SHA256 = None
 EMBEDDING_MODEL_ID = "sentence-transformers/all-MiniLM-L12-v2"
 EMBEDDING_MODEL_DIR = MODEL_DIR
 
+# === Download constants ===
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_SEGMENT_SIZE = 64 * 1024 * 1024  # keep fixed so partial segments resume
+
 # === RAG constants ===
 RAG_STORES_PATH = ROOT_DIR / "rag"
+RAG_COLLECTION_PREFIX = "a3d3-knowledge"  # one collection per shard: <prefix>-<shard>
 
 STATIC_DIR = ROOT_DIR / "src" / "chata3d3" / "static"
 
@@ -1,6 +1,7 @@
 import sys
 import re
 import csv
+import argparse
 from pathlib import Path
 from typing import List, Dict, Optional
 import requests
@@ -93,17 +94,27 @@ def extract_nsf_paper_metadata(
     papers = parse_nsf_award_html(html)
     if len(papers) == 0:
         sys.exit("No CSV parsed!")
+    for paper in papers:
+        paper["award_id"] = award_id
 
     keys = list(papers[0].keys())
     output_path = Path(output_csv)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    # Keep the papers of other awards; replace only this award's rows
+    rows = []
+    if output_path.exists():
+        with output_path.open(newline="", encoding="utf-8") as f:
+            rows = [r for r in csv.DictReader(f) if r.get("award_id") != award_id]
+    rows.extend(papers)
+    rows.sort(key=lambda row: (row.get("award_id") or "", int(row["index"])))
+
     with output_path.open("w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=keys)
         writer.writeheader()
-        writer.writerows(papers)
+        writer.writerows(rows)
 
-    logger.info(f"Saved {len(papers)} entries to {output_path}")
+    logger.info(f"Saved {len(papers)} entries for award {award_id} to {output_path}")
 
     return output_path
 
@@ -112,6 +123,12 @@ def sanitize_filename(text):
     return re.sub(r"[^a-zA-Z0-9_\\-]", "_", text)[:80]
 
 
+def paper_pdf_filename(paper: Dict) -> str:
+    # `index` restarts at 1 for every award, so the award keeps names unique
+    short_title = sanitize_filename(paper["title"][:60])
+    return f"paper_{paper['award_id']}_{paper['index']}_{short_title}.pdf"
+
+
 def download_pdf(url, filename):
     try:
         r = requests.get(url, timeout=15, stream=True)
@@ -147,13 +164,11 @@ def download_pdfs_from_metadata(
 
     for paper in papers:
         index = paper["index"]
-        text = paper["title"]
         doi = paper["doi"]
         nsf_citation_id = paper["nsf_citation_id"]
 
         logging.info(f"📄 Processing paper {index}")
-        short_title = sanitize_filename(text[:60])
-        filename = output_dir / f"paper_{index}_{short_title}.pdf"
+        filename = output_dir / paper_pdf_filename(paper)
 
         if Path(filename).exists():
             logger.info(f"✅ Already downloaded: {filename}")
@@ -209,9 +224,15 @@ def download_pdfs_from_metadata(
             writer.writerows(failed_entries)
         logging.warning(f"⚠️ Logged {len(failed_entries)} failed entries to {fail_log}")
     else:
+        fail_log.unlink(missing_ok=True)
         logging.info("🎉 All PDFs downloaded successfully!")
 
 
 if __name__ == "__main__":
-    extract_nsf_paper_metadata(output_csv=PAPER_CSV_PATH)
+    parser = argparse.ArgumentParser(description="Fetch papers of NSF awards.")
+    parser.add_argument("award_ids", nargs="*", default=["2117997"])
+    args = parser.parse_args()
+
+    for award_id in args.award_ids:
+        extract_nsf_paper_metadata(award_id=award_id, output_csv=PAPER_CSV_PATH)
     download_pdfs_from_metadata(csv_path=PAPER_CSV_PATH, data_path=DATA_DIR)
@@ -1,3 +1,5 @@
+import logging
+
 import panel as pn
 from uuid import uuid4
 from langchain_core.prompts import PromptTemplate
@@ -5,16 +7,20 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_core.callbacks import CallbackManager
 from langchain_community.llms import LlamaCpp
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
 
 from chata3d3.config import (
+    setup_logging,
     MODEL_DIR,
     MODEL_FILENAME,
     RAG_STORES_PATH,
     EMBEDDING_MODEL_ID,
     STATIC_DIR,
 )
+from chata3d3.rag.sharded_retriever import ShardedRetriever, load_shard_stores
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 pn.extension()
 
@@ -22,10 +28,19 @@ use_rag_toggle = pn.widgets.Checkbox(name="Use RAG", value=True)
 
 qdrant_client = QdrantClient(path=RAG_STORES_PATH)
 embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_ID)
-vector_store = QdrantVectorStore(
-    client=qdrant_client,
-    collection_name="a3d3-knowledge",
-    embedding=embedding_model,
+vector_stores = load_shard_stores(qdrant_client, embedding_model)
+if not vector_stores:
+    logger.error(
+        f"❌ No shard collections found in {RAG_STORES_PATH}, RAG is disabled. "
+        "Run `python -m chata3d3.rag.build_rag_vector_store` to build them."
+    )
+    use_rag_toggle.value = False
+    use_rag_toggle.disabled = True
+
+shard_select = pn.widgets.MultiChoice(
+    name="Search shards",
+    options=list(vector_stores),
+    placeholder="All shards",
 )
 
 rag_template = (
@@ -41,7 +56,7 @@ no_rag_template = """You are a helpful assistant. Please answer the question.
 Question: {question}"""
 
 
-def get_chain(callback_handlers, use_rag: bool):
+def get_chain(callback_handlers, use_rag: bool, shards=None):
     callback_manager = CallbackManager(callback_handlers)
 
     llm = LlamaCpp(
@@ -55,10 +70,12 @@ def get_chain(callback_handlers, use_rag: bool):
     )
 
     if use_rag:
-        retriever = vector_store.as_retriever(
+        retriever = ShardedRetriever(
+            vector_stores=vector_stores,
+            embedding=embedding_model,
+            shards=shards or None,
+            k=2,
             callbacks=callback_handlers,
-            search_type="mmr",
-            search_kwargs={"k": 2},
         )
 
         def format_docs(docs):
@@ -94,11 +111,11 @@ async def callback(contents, user, instance):
     )
     handler.on_llm_end = lambda *_: None
 
-    chain = get_chain([handler], use_rag_toggle.value)
+    chain = get_chain([handler], use_rag_toggle.value, shard_select.value)
     await chain.ainvoke(contents)
 
 
 chat_interface = pn.chat.ChatInterface(callback=callback)
-dashboard = pn.Column(use_rag_toggle, chat_interface)
+dashboard = pn.Column(pn.Row(use_rag_toggle, shard_select), chat_interface)
 
 pn.serve({"/": dashboard}, port=5006, websocket_origin="*", show=False)
@@ -1,5 +1,10 @@
+import argparse
+import csv
 import re
 import logging
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlparse
 
 from langchain_community.document_loaders import BSHTMLLoader, PyMuPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -13,14 +18,21 @@ from chata3d3.config import (
     setup_logging,
     PDF_DIR,
     HTML_DIR,
+    HTML_CSV_PATH,
+    PAPER_CSV_PATH,
     EMBEDDING_MODEL_DIR,
     EMBEDDING_MODEL_ID,
     RAG_STORES_PATH,
+    RAG_COLLECTION_PREFIX,
 )
+from chata3d3.loaders.paper_nsf_loader import paper_pdf_filename
+from chata3d3.rag.sharded_retriever import list_shards, shard_collection_name
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+SHARD_MODES = ("source", "type")
+
 
 def clean_docs(docs):
     cleaned = []
@@ -39,24 +51,94 @@ def clean_docs(docs):
     return cleaned
 
 
-def build_rag_vector_store(store_path, embedding_model_path):
-    logger.info("📄 Loading PDF documents...")
-    pdf_docs = []
-    for path in sorted(PDF_DIR.glob("*.pdf")):
-        loader = PyMuPDFLoader(str(path))
-        pdf_docs.extend(loader.load())
-
-    logger.info("📄 Loading HTML documents...")
-    html_docs = []
-    for path in sorted(HTML_DIR.glob("*.html")):
-        loader = BSHTMLLoader(str(path))
+def load_web_hosts(csv_path=HTML_CSV_PATH):
+    """Map downloaded HTML file names to the website they were fetched from."""
+    if not Path(csv_path).exists():
+        return {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return {
+            Path(row["filename"]).name: urlparse(row["url"]).netloc
+            for row in csv.DictReader(f)
+        }
+
+
+def load_paper_awards(csv_path=PAPER_CSV_PATH):
+    """Map downloaded PDF file names to the NSF award the paper belongs to."""
+    if not Path(csv_path).exists():
+        return {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return {
+            paper_pdf_filename(row): row["award_id"]
+            for row in csv.DictReader(f)
+            if row.get("award_id")
+        }
+
+
+def shard_name(kind, source=None):
+    """Build a shard name that is also a valid Qdrant collection suffix."""
+    name = f"{kind}-{source}" if source else kind
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def collect_shard_sources(
+    shard_by="source",
+    pdf_dir=PDF_DIR,
+    html_dir=HTML_DIR,
+    paper_csv_path=PAPER_CSV_PATH,
+    html_csv_path=HTML_CSV_PATH,
+):
+    """Group the PDF and HTML files by the shard they are stored in.
+
+    With `shard_by="type"` there is one shard per document type (`papers`,
+    `web`). With `shard_by="source"` papers go to `papers-<award_id>` and web
+    pages to `web-<host>`, according to the paper and web page CSVs; files
+    missing from those CSVs fall back to the per-type shard.
+    """
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"shard_by must be one of {SHARD_MODES}, got {shard_by!r}")
+    by_source = shard_by == "source"
+    paper_awards = load_paper_awards(paper_csv_path) if by_source else {}
+    web_hosts = load_web_hosts(html_csv_path) if by_source else {}
+    sources = defaultdict(list)
+
+    for path in sorted(Path(pdf_dir).glob("*.pdf")):
+        sources[shard_name("papers", paper_awards.get(path.name))].append(path)
+
+    for path in sorted(Path(html_dir).glob("*.html")):
+        sources[shard_name("web", web_hosts.get(path.name))].append(path)
+
+    return dict(sources)
+
+
+def drop_stale_collections(client, keep):
+    """Delete shard collections not in `keep`, plus the legacy single one."""
+    stale = [shard_collection_name(s) for s in list_shards(client) if s not in keep]
+    if client.collection_exists(RAG_COLLECTION_PREFIX):
+        stale.append(RAG_COLLECTION_PREFIX)
+    for collection_name in stale:
+        logger.info(f"🗑️ Dropping stale collection '{collection_name}'")
+        client.delete_collection(collection_name)
+
+
+def load_docs(paths):
+    docs = []
+    for path in paths:
+        if path.suffix == ".pdf":
+            docs.extend(PyMuPDFLoader(str(path)).load())
+            continue
         try:
-            html_docs.extend(loader.load())
+            docs.extend(BSHTMLLoader(str(path)).load())
         except Exception as e:
             logger.warning(f"❌ Failed to load {path}: {e}")
+    return docs
+
+
+def build_shard(client, embeddings_model, vector_size, shard, paths, shard_by):
+    logger.info(f"📄 Loading {len(paths)} documents for shard '{shard}'...")
+    docs = load_docs(paths)
 
     logger.info("🧼 Cleaning documents...")
-    docs = clean_docs(pdf_docs + html_docs)
+    docs = clean_docs(docs)
 
     logger.info("✂️ Splitting documents into chunks...")
     text_splitter = RecursiveCharacterTextSplitter(
@@ -65,15 +147,11 @@ def build_rag_vector_store(store_path, embedding_model_path):
         separators=["\n\n", "\n", ".", " ", ""],
     )
     chunks = text_splitter.split_documents(docs)
+    for chunk in chunks:
+        chunk.metadata["shard"] = shard
+        chunk.metadata["shard_by"] = shard_by
 
-    logger.info(f"🧠 Loading embedding model from: {embedding_model_path}")
-    embeddings_model = HuggingFaceEmbeddings(model_name=str(embedding_model_path))
-    vector_size = len(embeddings_model.embed_query("test"))
-
-    logger.info(f"🧱 Creating Qdrant collection at {store_path}...")
-    client = QdrantClient(path=str(store_path))
-
-    collection_name = "a3d3-knowledge"
+    collection_name = shard_collection_name(shard)
     client.recreate_collection(
         collection_name=collection_name,
         vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
@@ -93,8 +171,73 @@ def build_rag_vector_store(store_path, embedding_model_path):
     )
 
 
+def shard_mode(client, shard):
+    """Return the `shard_by` a shard collection was built with, if recorded."""
+    points, _ = client.scroll(
+        shard_collection_name(shard), limit=1, with_payload=True, with_vectors=False
+    )
+    if not points:
+        return None
+    metadata = points[0].payload.get(QdrantVectorStore.METADATA_KEY) or {}
+    return metadata.get("shard_by")
+
+
+def update_shards(client, embeddings_model, sources, shards=None, shard_by="source"):
+    """(Re)build the shard collections in `client` from `sources`.
+
+    `shards=None` rebuilds every shard and drops the collections of shards that
+    no longer exist. Otherwise only the named shards are rebuilt and the other
+    collections are left untouched; this is refused if the store holds shards
+    that `shard_by` would not produce (e.g. it was built with the other mode),
+    as the fan-out would then return the same chunks from two shards.
+    """
+    if shards is None:
+        drop_stale_collections(client, keep=sources)
+    else:
+        foreign = [
+            s
+            for s in list_shards(client)
+            if s not in sources or shard_mode(client, s) not in (None, shard_by)
+        ]
+        if foreign:
+            raise ValueError(
+                f"Store has shards {foreign} that shard_by={shard_by!r} does not "
+                "produce; run a full rebuild to replace them."
+            )
+        for shard in set(shards) - set(sources):
+            logger.warning(f"⚠️ No documents found for shard '{shard}', skipping.")
+        sources = {k: v for k, v in sources.items() if k in shards}
+
+    vector_size = len(embeddings_model.embed_query("test"))
+    for shard, paths in sources.items():
+        build_shard(client, embeddings_model, vector_size, shard, paths, shard_by)
+
+
+def build_rag_vector_store(
+    store_path, embedding_model_path, shards=None, shard_by="source"
+):
+    """Build one Qdrant collection per shard, see `update_shards`."""
+    sources = collect_shard_sources(shard_by)
+
+    logger.info(f"🧠 Loading embedding model from: {embedding_model_path}")
+    embeddings_model = HuggingFaceEmbeddings(model_name=str(embedding_model_path))
+
+    logger.info(f"🧱 Opening Qdrant store at {store_path}...")
+    client = QdrantClient(path=str(store_path))
+    update_shards(client, embeddings_model, sources, shards, shard_by)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sharded RAG store.")
+    parser.add_argument(
+        "shards", nargs="*", help="shards to rebuild (default: all, dropping stale)"
+    )
+    parser.add_argument("--shard-by", choices=SHARD_MODES, default="source")
+    args = parser.parse_args()
+
     build_rag_vector_store(
         store_path=RAG_STORES_PATH,
         embedding_model_path=EMBEDDING_MODEL_DIR / EMBEDDING_MODEL_ID,
+        shards=args.shards or None,
+        shard_by=args.shard_by,
     )
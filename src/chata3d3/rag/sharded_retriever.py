@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+from langchain_qdrant import QdrantVectorStore
+
+from chata3d3.config import RAG_COLLECTION_PREFIX
+
+
+def shard_collection_name(shard: str) -> str:
+    return f"{RAG_COLLECTION_PREFIX}-{shard}"
+
+
+def list_shards(client) -> List[str]:
+    """Return the shard names of every sharded collection in the store."""
+    prefix = f"{RAG_COLLECTION_PREFIX}-"
+    return sorted(
+        c.name.removeprefix(prefix)
+        for c in client.get_collections().collections
+        if c.name.startswith(prefix)
+    )
+
+
+def load_shard_stores(client, embedding: Embeddings) -> Dict[str, QdrantVectorStore]:
+    return {
+        shard: QdrantVectorStore(
+            client=client,
+            collection_name=shard_collection_name(shard),
+            embedding=embedding,
+        )
+        for shard in list_shards(client)
+    }
+
+
+def search_with_vectors(store: VectorStore, query_vector, k: int):
+    """Return `(doc, score, vector)` hits for `query_vector` from `store`.
+
+    Qdrant stores are asked for their stored vectors so MMR needs no extra
+    embedding; for other stores `vector` is None.
+    """
+    if not isinstance(store, QdrantVectorStore):
+        hits = store.similarity_search_with_score_by_vector(query_vector, k=k)
+        return [(doc, score, None) for doc, score in hits]
+
+    points = store.client.query_points(
+        collection_name=store.collection_name,
+        query=query_vector,
+        using=store.vector_name or None,
+        limit=k,
+        with_payload=True,
+        with_vectors=True,
+    ).points
+    hits = []
+    for point in points:
+        vector = point.vector
+        if isinstance(vector, dict):
+            vector = vector[store.vector_name]
+        doc = QdrantVectorStore._document_from_point(
+            point,
+            store.collection_name,
+            store.content_payload_key,
+            store.metadata_payload_key,
+        )
+        hits.append((doc, point.score, vector))
+    return hits
+
+
+class ShardedRetriever(BaseRetriever):
+    """Fan a query out to several shard collections and merge the hits.
+
+    The query is embedded once and the `fetch_k` closest chunks of every
+    selected shard, with their stored vectors, are searched concurrently. The
+    best `fetch_k` of those are re-ranked with maximal marginal relevance, as
+    the single-collection "mmr" retriever did, so the `k` returned chunks are
+    not near-duplicate neighbours. Each document carries its `shard` and
+    `score` in the metadata.
+    """
+
+    vector_stores: Dict[str, VectorStore]
+    embedding: Embeddings
+    shards: Optional[List[str]] = None  # None or [] -> search every shard
+    k: int = 2
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    max_workers: int = 8
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        names = self.shards or list(self.vector_stores)
+        unknown = [name for name in names if name not in self.vector_stores]
+        if unknown:
+            raise ValueError(f"Unknown shards: {unknown}")
+        if not names:
+            raise ValueError("No shards to search, build the vector store first")
+
+        query_vector = self.embedding.embed_query(query)
+
+        def search(name):
+            hits = search_with_vectors(
+                self.vector_stores[name], query_vector, self.fetch_k
+            )
+            return [(name, *hit) for hit in hits]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as ex:
+            scored = [hit for hits in ex.map(search, names) for hit in hits]
+
+        # Cosine similarity: higher is closer
+        scored.sort(key=lambda hit: hit[2], reverse=True)
+        candidates = scored[: self.fetch_k]
+        if not candidates:
+            return []
+
+        # Only stores that cannot return vectors need the chunks re-embedded
+        missing = [i for i, (*_, vector) in enumerate(candidates) if vector is None]
+        if missing:
+            embedded = self.embedding.embed_documents(
+                [candidates[i][1].page_content for i in missing]
+            )
+            for i, vector in zip(missing, embedded):
+                candidates[i] = (*candidates[i][:3], vector)
+
+        selected = maximal_marginal_relevance(
+            np.array(query_vector),
+            [vector for *_, vector in candidates],
+            lambda_mult=self.lambda_mult,
+            k=self.k,
+        )
+
+        docs = []
+        for i in selected:
+            name, doc, score, _ = candidates[i]
+            doc.metadata["shard"] = name
+            doc.metadata["score"] = score
+            docs.append(doc)
+        return docs
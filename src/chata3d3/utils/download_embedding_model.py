@@ -1,12 +1,16 @@
 import logging
+from fnmatch import fnmatch
 from pathlib import Path
 
-from huggingface_hub import snapshot_download
+from huggingface_hub import HfApi, hf_hub_url
 from chata3d3.config import setup_logging, EMBEDDING_MODEL_DIR, EMBEDDING_MODEL_ID
+from chata3d3.utils.parallel_download import create_session, download_file
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
+IGNORE_PATTERNS = ["*.msgpack", "*.arrow"]
+
 
 def download_embedding_model(model_dir: str, model_id: str):
     """Download a HuggingFace model to a specific directory."""
@@ -18,13 +22,27 @@ def download_embedding_model(model_dir: str, model_id: str):
     logger.info(f"⬇️ Downloading embedding model from {model_id} to {model_path}...")
     model_path.mkdir(parents=True, exist_ok=True)
 
-    snapshot_download(
-        repo_id=model_id,
-        local_dir=model_path,
-        local_dir_use_symlinks=False,
-        token=None,
-        ignore_patterns=["*.msgpack", "*.arrow"],
-    )
+    info = HfApi().model_info(model_id, files_metadata=True)
+    siblings = [
+        s
+        for s in info.siblings
+        if not any(fnmatch(s.rfilename, p) for p in IGNORE_PATTERNS)
+    ]
+    # config.json marks a complete snapshot above, so fetch it last
+    siblings.sort(key=lambda s: s.rfilename == "config.json")
+
+    session = create_session()
+    for sibling in siblings:
+        dest = model_path / sibling.rfilename
+        if dest.exists():
+            continue
+        download_file(
+            hf_hub_url(model_id, sibling.rfilename, revision=info.sha),
+            dest,
+            # Only LFS files carry a SHA-256; small git blobs are unchecked
+            sha256=sibling.lfs.sha256 if sibling.lfs else None,
+            session=session,
+        )
 
     logger.info(f"✅ Download completed: {model_path}")
     return model_path
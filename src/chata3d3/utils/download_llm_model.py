@@ -1,8 +1,20 @@
-import requests
 from pathlib import Path
-from tqdm import tqdm
 
-from chata3d3.config import setup_logging, MODEL_FILENAME, MODEL_DIR, MODEL_URL
+import requests
+
+from chata3d3.config import (
+    setup_logging,
+    MODEL_FILENAME,
+    MODEL_DIR,
+    MODEL_URL,
+    MODEL_SHA256,
+)
+from chata3d3.utils.parallel_download import (
+    create_session,
+    download_file,
+    probe_remote_file,
+    sha256sum,
+)
 
 import logging
 
@@ -10,35 +22,35 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
-def download_llm_model(model_dir: str):
-    """Download the model file if not present in model_dir."""
+def download_llm_model(model_dir: str, url: str = MODEL_URL, sha256=MODEL_SHA256):
+    """Download the model file if not present in model_dir.
+
+    The file is only renamed into model_dir after its SHA-256 has been checked,
+    so an interrupted download resumes on the next run instead of leaving a
+    truncated model behind.
+    """
     model_path = Path(model_dir) / MODEL_FILENAME
 
     if model_path.exists():
-        logging.info(f"✅ Model already exists at: {model_path}")
-        return model_path
-
-    logging.info(f"⬇️ Model not found at {model_path}, downloading from HuggingFace...")
-    model_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with requests.get(MODEL_URL, stream=True) as r:
-        r.raise_for_status()
-        total = int(r.headers.get("content-length", 0))
-        with (
-            open(model_path, "wb") as f,
-            tqdm(
-                desc=f"Downloading {MODEL_FILENAME}",
-                total=total,
-                unit="B",
-                unit_scale=True,
-                unit_divisor=1024,
-            ) as bar,
-        ):
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-                bar.update(len(chunk))
-
-    logging.info(f"✅ Download completed: {model_path}")
+        if sha256 is None:
+            # A file left by an older, non-atomic download may be truncated
+            try:
+                sha256 = probe_remote_file(create_session(), url)["sha256"]
+            except requests.RequestException as e:
+                logger.warning(f"⚠️ Cannot fetch the model hash to verify it: {e}")
+        if sha256 is None:
+            logger.warning(f"⚠️ Using unverified model at: {model_path}")
+            return model_path
+        if sha256sum(model_path) == sha256.lower():
+            logger.info(f"✅ Model already exists at: {model_path}")
+            return model_path
+        logger.warning(f"⚠️ Checksum mismatch for {model_path}, downloading again")
+        model_path.unlink()
+
+    logger.info(f"⬇️ Model not found at {model_path}, downloading from HuggingFace...")
+    download_file(url, model_path, sha256=sha256)
+
+    logger.info(f"✅ Download completed: {model_path}")
     return model_path
 
 
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+from chata3d3.config import setup_logging, DOWNLOAD_WORKERS, DOWNLOAD_SEGMENT_SIZE
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+SHA256_RE = re.compile(r"[0-9a-f]{64}")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def create_session():
+    session = requests.Session()
+    retry = Retry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET"],
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=DOWNLOAD_WORKERS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Sizes and byte ranges must refer to the stored bytes, not a gzip stream
+    session.headers["Accept-Encoding"] = "identity"
+    return session
+
+
+def sha256sum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def probe_remote_file(session, url: str) -> dict:
+    """Return size, range support, etag and (if advertised) SHA-256 of `url`."""
+    r = session.head(url, allow_redirects=True, timeout=30)
+    r.raise_for_status()
+
+    # HuggingFace puts the LFS SHA-256 on the redirect, not on the CDN response
+    sha256 = None
+    for resp in [*r.history, r]:
+        etag = resp.headers.get("x-linked-etag", "").removeprefix("W/").strip('"')
+        if SHA256_RE.fullmatch(etag.lower()):
+            sha256 = etag.lower()
+            break
+
+    return {
+        "size": int(r.headers.get("content-length", 0)),
+        "accept_ranges": r.headers.get("accept-ranges", "").lower() == "bytes",
+        "etag": r.headers.get("etag", ""),
+        "sha256": sha256,
+    }
+
+
+def plan_segments(size: int, segment_size: int):
+    """Split [0, size) into inclusive (start, end) byte ranges."""
+    return [
+        (start, min(start + segment_size, size) - 1)
+        for start in range(0, size, segment_size)
+    ]
+
+
+class DownloadState:
+    """Bytes written per segment, persisted next to the partial file.
+
+    The state is only reused if its manifest (url, size, etag, segment size)
+    matches the current remote file; otherwise the download starts over.
+    """
+
+    def __init__(self, path: Path, manifest: dict, n_segments: int):
+        self.path = path
+        self.manifest = manifest
+        self.done = [0] * n_segments
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, manifest: dict, n_segments: int):
+        state = cls(path, manifest, n_segments)
+        if path.exists():
+            try:
+                saved = json.loads(path.read_text())
+                if saved["manifest"] == manifest and len(saved["done"]) == n_segments:
+                    state.done = saved["done"]
+            except (ValueError, KeyError):
+                pass
+        return state
+
+    def advance(self, index: int, n: int):
+        with self.lock:
+            self.done[index] += n
+            self.save()
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"manifest": self.manifest, "done": self.done}))
+        os.replace(tmp, self.path)
+
+
+def download_segment(
+    session, url, tmp_path: Path, state, index, start, end, chunk_size, bar, stop
+):
+    """Fetch bytes [start, end] into their offset of `tmp_path`, resuming."""
+    offset = start + state.done[index]
+    if offset > end or stop.is_set():
+        return
+
+    headers = {"Range": f"bytes={offset}-{end}"}
+    with session.get(url, headers=headers, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        if r.status_code != 206:
+            raise RuntimeError(f"Server ignored range request for {url}")
+        with open(tmp_path, "r+b") as f:
+            f.seek(offset)
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if stop.is_set():
+                    return
+                chunk = chunk[: end + 1 - offset]
+                f.write(chunk)
+                offset += len(chunk)
+                state.advance(index, len(chunk))
+                bar.update(len(chunk))
+
+    if offset != end + 1:
+        raise RuntimeError(f"Incomplete segment {index} for {url}")
+
+
+def download_stream(session, url, tmp_path: Path, chunk_size, bar):
+    """Single-connection fallback for servers without range support."""
+    with session.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                bar.update(len(chunk))
+
+
+def download_segments(
+    session, url, tmp_path, state, segments, max_workers, chunk_size, bar
+):
+    """Download all segments concurrently, stopping every worker on failure."""
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [
+            executor.submit(
+                download_segment,
+                session,
+                url,
+                tmp_path,
+                state,
+                index,
+                start,
+                end,
+                chunk_size,
+                bar,
+                stop,
+            )
+            for index, (start, end) in enumerate(segments)
+        ]
+        # Surface the first failure right away instead of in submission order
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            future.result()
+    except BaseException:
+        stop.set()
+        executor.shutdown(cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def download_file(
+    url: str,
+    dest: Path,
+    sha256: Optional[str] = None,
+    max_workers: int = DOWNLOAD_WORKERS,
+    segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    session=None,
+) -> Path:
+    """Download `url` to `dest` with parallel range requests.
+
+    Segments are written at their offsets into a preallocated hidden
+    `.<name>.part` file, with per-segment progress in `.<name>.part.json`, so an
+    interrupted download resumes where each segment stopped. The file is checked
+    against `sha256` (or the hash advertised by the server) and only then renamed
+    into place, so `dest` existing means the download completed.
+    """
+    dest = Path(dest)
+    session = session or create_session()
+
+    remote = probe_remote_file(session, url)
+    sha256 = (sha256 or remote["sha256"] or "").lower() or None
+    if sha256 is None:
+        logger.info(f"⚠️ No SHA-256 known for {url}, skipping integrity check")
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.parent / f".{dest.name}.part"
+    state_path = dest.parent / f".{dest.name}.part.json"
+    ranged = remote["accept_ranges"] and remote["size"] > 0
+
+    with tqdm(
+        desc=f"Downloading {dest.name}",
+        total=remote["size"] or None,
+        unit="B",
+        unit_scale=True,
+        unit_divisor=1024,
+    ) as bar:
+        if ranged:
+            segments = plan_segments(remote["size"], segment_size)
+            manifest = {
+                "url": url,
+                "size": remote["size"],
+                "etag": remote["etag"],
+                "segment_size": segment_size,
+            }
+            state = DownloadState.load(state_path, manifest, len(segments))
+            resumed = sum(state.done)
+            if (
+                resumed
+                and tmp_path.exists()
+                and tmp_path.stat().st_size == remote["size"]
+            ):
+                logger.info(f"⏯️ Resuming {dest.name} from {resumed} bytes")
+            else:
+                if state_path.exists():
+                    logger.info(f"♻️ Discarding stale partial download of {dest.name}")
+                state.done = [0] * len(segments)
+                state.save()
+                with open(tmp_path, "wb") as f:
+                    f.truncate(remote["size"])
+            bar.update(sum(state.done))
+            download_segments(
+                session, url, tmp_path, state, segments, max_workers, chunk_size, bar
+            )
+        else:
+            logger.info(f"↪️ {url} does not support ranges, using one connection")
+            state_path.unlink(missing_ok=True)
+            download_stream(session, url, tmp_path, chunk_size, bar)
+
+    logger.info(f"🔍 Verifying {dest.name}...")
+    if sha256 is not None:
+        actual = sha256sum(tmp_path)
+        if actual != sha256:
+            tmp_path.unlink()
+            state_path.unlink(missing_ok=True)
+            raise ValueError(
+                f"SHA-256 mismatch for {dest.name}: expected {sha256}, got {actual}"
+            )
+
+    os.replace(tmp_path, dest)
+    state_path.unlink(missing_ok=True)
+    logger.info(f"✅ Verified and saved: {dest}")
+    return dest
@@ -0,0 +1,65 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve `server.files`, honouring `Range: bytes=a-b` unless disabled."""
+
+    def log_message(self, *args):
+        pass
+
+    def send_data(self, body, status):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        linked_etag = self.server.linked_etags.get(self.path)
+        if linked_etag:
+            self.send_header("X-Linked-Etag", f'"{linked_etag}"')
+        self.end_headers()
+        return body
+
+    def do_HEAD(self):
+        if self.path not in self.server.files:
+            self.send_error(404)
+            return
+        self.send_data(self.server.files[self.path], 200)
+
+    def do_GET(self):
+        data = self.server.files.get(self.path)
+        rng = self.headers.get("Range")
+        self.server.requested.append((self.path, rng))
+        if data is None:
+            self.send_error(404)
+            return
+        time.sleep(self.server.delays.get(rng, 0))
+        if rng in self.server.fail_ranges:
+            self.send_error(500)
+            return
+        if rng and self.server.ranges:
+            start, end = map(int, rng.removeprefix("bytes=").split("-"))
+            stop = end + 1
+            body = self.send_data(data[start:stop], 206)
+        else:
+            body = self.send_data(data, 200)
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    srv.files = {}
+    srv.ranges = True
+    srv.linked_etags = {}
+    srv.fail_ranges = set()
+    srv.delays = {}
+    srv.requested = []
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    srv.base_url = f"http://127.0.0.1:{srv.server_port}"
+    yield srv
+    srv.shutdown()
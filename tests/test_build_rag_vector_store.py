@@ -0,0 +1,176 @@
+import csv
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from chata3d3.config import RAG_COLLECTION_PREFIX
+from chata3d3.rag import build_rag_vector_store as build
+from chata3d3.rag.sharded_retriever import list_shards, shard_collection_name
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Two awards' papers, one unlisted PDF and pages from two websites."""
+    pdf_dir = tmp_path / "pdfs"
+    html_dir = tmp_path / "htmls"
+    pdf_dir.mkdir()
+    html_dir.mkdir()
+
+    papers = [
+        {"index": "1", "title": "Fast ML", "award_id": "111"},
+        {"index": "1", "title": "GNN tracking", "award_id": "222"},
+    ]
+    write_csv(tmp_path / "papers.csv", papers)
+    for paper in papers:
+        (pdf_dir / build.paper_pdf_filename(paper)).write_bytes(b"")
+    (pdf_dir / "unlisted.pdf").write_bytes(b"")
+
+    pages = {"0000.html": "https://a3d3.ai/news/", "0001.html": "https://x.org/"}
+    write_csv(
+        tmp_path / "webs.csv",
+        [{"url": url, "filename": f"/elsewhere/{name}"} for name, url in pages.items()],
+    )
+    for name, url in pages.items():
+        (html_dir / name).write_text(
+            f"<html><body><p>Page from {url}</p></body></html>", encoding="utf-8"
+        )
+    (html_dir / "0002.html").write_text("<p>unlisted</p>", encoding="utf-8")
+
+    return {
+        "pdf_dir": pdf_dir,
+        "html_dir": html_dir,
+        "paper_csv_path": tmp_path / "papers.csv",
+        "html_csv_path": tmp_path / "webs.csv",
+    }
+
+
+def shard_files(sources):
+    return {shard: sorted(p.name for p in paths) for shard, paths in sources.items()}
+
+
+def test_shard_name_is_sanitised():
+    assert build.shard_name("web", "a3d3.ai") == "web-a3d3.ai"
+    assert build.shard_name("web", "host:8080/x y") == "web-host_8080_x_y"
+    assert build.shard_name("papers") == "papers"
+
+
+def test_csv_mappings(corpus):
+    assert build.load_paper_awards(corpus["paper_csv_path"]) == {
+        "paper_111_1_Fast_ML.pdf": "111",
+        "paper_222_1_GNN_tracking.pdf": "222",
+    }
+    assert build.load_web_hosts(corpus["html_csv_path"]) == {
+        "0000.html": "a3d3.ai",
+        "0001.html": "x.org",
+    }
+    assert build.load_paper_awards(corpus["pdf_dir"] / "missing.csv") == {}
+
+
+def test_collect_by_source(corpus):
+    sources = build.collect_shard_sources("source", **corpus)
+
+    assert shard_files(sources) == {
+        "papers-111": ["paper_111_1_Fast_ML.pdf"],
+        "papers-222": ["paper_222_1_GNN_tracking.pdf"],
+        "papers": ["unlisted.pdf"],
+        "web-a3d3.ai": ["0000.html"],
+        "web-x.org": ["0001.html"],
+        "web": ["0002.html"],
+    }
+
+
+def test_collect_by_type(corpus):
+    sources = build.collect_shard_sources("type", **corpus)
+
+    assert {shard: len(files) for shard, files in shard_files(sources).items()} == {
+        "papers": 3,
+        "web": 3,
+    }
+
+
+def test_collect_rejects_unknown_mode(corpus):
+    with pytest.raises(ValueError, match="shard_by"):
+        build.collect_shard_sources("award", **corpus)
+
+
+def make_collections(client, names):
+    for name in names:
+        client.create_collection(
+            name, vectors_config=VectorParams(size=8, distance=Distance.COSINE)
+        )
+
+
+def test_drop_stale_collections_includes_legacy():
+    client = QdrantClient(":memory:")
+    make_collections(
+        client,
+        [
+            RAG_COLLECTION_PREFIX,
+            shard_collection_name("web"),
+            shard_collection_name("web-a3d3.ai"),
+        ],
+    )
+
+    build.drop_stale_collections(client, keep={"web-a3d3.ai": []})
+
+    assert [c.name for c in client.get_collections().collections] == [
+        shard_collection_name("web-a3d3.ai")
+    ]
+
+
+def web_sources(corpus, shard_by):
+    sources = build.collect_shard_sources(shard_by, **corpus)
+    return {k: v for k, v in sources.items() if k.startswith("web")}
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=8)
+
+
+def test_full_rebuild_drops_shards_of_other_mode(corpus, embeddings):
+    client = QdrantClient(":memory:")
+    build.update_shards(client, embeddings, web_sources(corpus, "type"), None, "type")
+    assert list_shards(client) == ["web"]
+
+    build.update_shards(client, embeddings, web_sources(corpus, "source"))
+
+    assert list_shards(client) == ["web", "web-a3d3.ai", "web-x.org"]
+    assert client.count(shard_collection_name("web")).count == 1
+
+
+def test_partial_rebuild_leaves_other_shards_alone(corpus, embeddings):
+    client = QdrantClient(":memory:")
+    sources = web_sources(corpus, "source")
+    build.update_shards(client, embeddings, sources)
+    before = client.count(shard_collection_name("web-x.org")).count
+
+    build.update_shards(client, embeddings, sources, shards=["web-a3d3.ai"])
+
+    assert list_shards(client) == ["web", "web-a3d3.ai", "web-x.org"]
+    assert client.count(shard_collection_name("web-x.org")).count == before
+
+
+def test_partial_rebuild_refuses_store_of_other_mode(corpus, embeddings):
+    client = QdrantClient(":memory:")
+    build.update_shards(client, embeddings, web_sources(corpus, "type"), None, "type")
+
+    # "web" also exists in source mode (unlisted pages), but holds every page
+    with pytest.raises(ValueError, match="full rebuild"):
+        build.update_shards(
+            client,
+            embeddings,
+            web_sources(corpus, "source"),
+            shards=["web-a3d3.ai"],
+            shard_by="source",
+        )
+    assert list_shards(client) == ["web"]
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from chata3d3.config import MODEL_FILENAME
+from chata3d3.utils import download_embedding_model as embedding_mod
+from chata3d3.utils import download_llm_model as llm_mod
+
+MODEL = os.urandom(100_000)
+MODEL_SHA256 = hashlib.sha256(MODEL).hexdigest()
+
+
+@pytest.fixture
+def model_server(server):
+    server.files["/model.gguf"] = MODEL
+    server.linked_etags["/model.gguf"] = MODEL_SHA256
+    server.url = f"{server.base_url}/model.gguf"
+    return server
+
+
+def test_llm_model_existing_verified_against_remote_hash(model_server, tmp_path):
+    (tmp_path / MODEL_FILENAME).write_bytes(MODEL)
+
+    path = llm_mod.download_llm_model(tmp_path, url=model_server.url, sha256=None)
+
+    assert path.read_bytes() == MODEL
+    assert model_server.requested == []  # only the HEAD probe
+
+
+def test_llm_model_truncated_is_downloaded_again(model_server, tmp_path):
+    (tmp_path / MODEL_FILENAME).write_bytes(MODEL[:1_000])
+
+    path = llm_mod.download_llm_model(tmp_path, url=model_server.url, sha256=None)
+
+    assert path.read_bytes() == MODEL
+    assert model_server.requested
+
+
+def test_llm_model_configured_hash_mismatch_is_downloaded_again(model_server, tmp_path):
+    (tmp_path / MODEL_FILENAME).write_bytes(b"corrupt")
+
+    path = llm_mod.download_llm_model(
+        tmp_path, url=model_server.url, sha256=MODEL_SHA256.upper()
+    )
+
+    assert path.read_bytes() == MODEL
+
+
+def test_llm_model_kept_with_warning_when_offline(monkeypatch, tmp_path, caplog):
+    def offline(session, url):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(llm_mod, "probe_remote_file", offline)
+    (tmp_path / MODEL_FILENAME).write_bytes(b"maybe truncated")
+
+    with caplog.at_level(logging.WARNING):
+        path = llm_mod.download_llm_model(tmp_path, url="http://x/m", sha256=None)
+
+    assert path.read_bytes() == b"maybe truncated"
+    assert "unverified" in caplog.text
+
+
+SNAPSHOT = {
+    "config.json": b'{"hidden_size": 4}',
+    "tokenizer.json": b'{"vocab": {}}',
+    "model.safetensors": os.urandom(20_000),
+    "flax_model.msgpack": b"ignored",
+}
+
+
+@pytest.fixture
+def snapshot_server(server, monkeypatch):
+    for name, data in SNAPSHOT.items():
+        server.files[f"/{name}"] = data
+
+    lfs = {"model.safetensors"}
+    siblings = [
+        SimpleNamespace(
+            rfilename=name,
+            lfs=(
+                SimpleNamespace(sha256=hashlib.sha256(data).hexdigest())
+                if name in lfs
+                else None
+            ),
+        )
+        for name, data in SNAPSHOT.items()
+    ]
+
+    class FakeHfApi:
+        def model_info(self, model_id, files_metadata=False):
+            return SimpleNamespace(sha="abc123", siblings=siblings)
+
+    calls = []
+    real_download_file = embedding_mod.download_file
+
+    def spy_download_file(url, dest, sha256=None, **kwargs):
+        calls.append((dest.name, sha256))
+        return real_download_file(url, dest, sha256=sha256, **kwargs)
+
+    monkeypatch.setattr(embedding_mod, "HfApi", FakeHfApi)
+    monkeypatch.setattr(
+        embedding_mod,
+        "hf_hub_url",
+        lambda repo_id, filename, revision=None: f"{server.base_url}/{filename}",
+    )
+    monkeypatch.setattr(embedding_mod, "download_file", spy_download_file)
+    server.calls = calls
+    return server
+
+
+def test_embedding_snapshot_downloads_config_last(snapshot_server, tmp_path):
+    path = embedding_mod.download_embedding_model(tmp_path, "org/model")
+
+    assert path == tmp_path / "org/model"
+    assert [name for name, _ in snapshot_server.calls][-1] == "config.json"
+    assert sorted(os.listdir(path)) == [
+        "config.json",
+        "model.safetensors",
+        "tokenizer.json",
+    ]
+    for name in os.listdir(path):
+        assert (path / name).read_bytes() == SNAPSHOT[name]
+
+
+def test_embedding_snapshot_checks_only_lfs_files(snapshot_server, tmp_path):
+    embedding_mod.download_embedding_model(tmp_path, "org/model")
+
+    hashes = dict(snapshot_server.calls)
+    assert (
+        hashes["model.safetensors"]
+        == hashlib.sha256(SNAPSHOT["model.safetensors"]).hexdigest()
+    )
+    assert hashes["config.json"] is None
+    assert hashes["tokenizer.json"] is None
+
+
+def test_embedding_snapshot_skips_files_already_present(snapshot_server, tmp_path):
+    model_path = tmp_path / "org/model"
+    model_path.mkdir(parents=True)
+    (model_path / "model.safetensors").write_bytes(SNAPSHOT["model.safetensors"])
+
+    embedding_mod.download_embedding_model(tmp_path, "org/model")
+
+    assert "model.safetensors" not in dict(snapshot_server.calls)
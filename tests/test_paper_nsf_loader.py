@@ -0,0 +1,41 @@
+import csv
+
+from chata3d3.loaders import paper_nsf_loader as loader
+
+
+def fake_award(monkeypatch, titles_by_award):
+    monkeypatch.setattr(loader, "fetch_nsf_award_html", lambda award_id: award_id)
+    monkeypatch.setattr(
+        loader,
+        "parse_nsf_award_html",
+        lambda award_id: [
+            {"index": i + 1, "title": title}
+            for i, title in enumerate(titles_by_award[award_id])
+        ],
+    )
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(r["award_id"], r["index"], r["title"]) for r in csv.DictReader(f)]
+
+
+def test_metadata_of_several_awards_is_merged(monkeypatch, tmp_path):
+    csv_path = tmp_path / "papers.csv"
+    titles = {"111": ["A", "B"], "222": ["C"]}
+    fake_award(monkeypatch, titles)
+
+    loader.extract_nsf_paper_metadata("111", output_csv=csv_path)
+    loader.extract_nsf_paper_metadata("222", output_csv=csv_path)
+    titles["111"] = ["A2"]
+    loader.extract_nsf_paper_metadata("111", output_csv=csv_path)
+
+    assert read_rows(csv_path) == [("111", "1", "A2"), ("222", "1", "C")]
+
+
+def test_pdf_filename_is_unique_across_awards():
+    first = {"award_id": "111", "index": "1", "title": "Same title"}
+    second = {"award_id": "222", "index": "1", "title": "Same title"}
+
+    assert loader.paper_pdf_filename(first) == "paper_111_1_Same_title.pdf"
+    assert loader.paper_pdf_filename(first) != loader.paper_pdf_filename(second)
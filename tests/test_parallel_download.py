@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+
+import pytest
+import requests
+
+from chata3d3.utils.parallel_download import download_file
+
+DATA = os.urandom(250_000)
+SHA256 = hashlib.sha256(DATA).hexdigest()
+SEGMENT_SIZE = 50_000
+
+
+@pytest.fixture
+def server(server):
+    server.files["/model.gguf"] = DATA
+    server.url = f"{server.base_url}/model.gguf"
+    return server
+
+
+def ranges_requested(server):
+    return [rng for _, rng in server.requested]
+
+
+def write_partial(tmp_path, url, done, etag='"v1"'):
+    """Leave a partial download behind as an interrupted run would."""
+    part = bytearray(len(DATA))
+    for index, n in enumerate(done):
+        start = index * SEGMENT_SIZE
+        stop = start + n
+        part[start:stop] = DATA[start:stop]
+    (tmp_path / ".model.gguf.part").write_bytes(bytes(part))
+    manifest = {
+        "url": url,
+        "size": len(DATA),
+        "etag": etag,
+        "segment_size": SEGMENT_SIZE,
+    }
+    (tmp_path / ".model.gguf.part.json").write_text(
+        json.dumps({"manifest": manifest, "done": done})
+    )
+
+
+def test_download_ranged(server, tmp_path):
+    dest = download_file(
+        server.url, tmp_path / "model.gguf", sha256=SHA256, segment_size=SEGMENT_SIZE
+    )
+
+    assert dest.read_bytes() == DATA
+    assert len(server.requested) == 5
+    assert sorted(os.listdir(tmp_path)) == ["model.gguf"]
+
+
+def test_download_resumes_partial_segments(server, tmp_path):
+    write_partial(tmp_path, server.url, [SEGMENT_SIZE, 1_000, 0, SEGMENT_SIZE, 3])
+
+    dest = download_file(
+        server.url,
+        tmp_path / "model.gguf",
+        sha256=SHA256.upper(),
+        segment_size=SEGMENT_SIZE,
+    )
+
+    assert dest.read_bytes() == DATA
+    assert sorted(ranges_requested(server)) == [
+        "bytes=100000-149999",
+        "bytes=200003-249999",
+        "bytes=51000-99999",
+    ]
+
+
+def test_download_discards_parts_when_manifest_changes(server, tmp_path):
+    write_partial(tmp_path, server.url, [SEGMENT_SIZE] * 5, etag='"v0"')
+    (tmp_path / ".model.gguf.part").write_bytes(b"\0" * len(DATA))
+
+    dest = download_file(
+        server.url, tmp_path / "model.gguf", sha256=SHA256, segment_size=SEGMENT_SIZE
+    )
+
+    assert dest.read_bytes() == DATA
+    assert len(server.requested) == 5
+
+
+def test_download_checksum_mismatch_cleans_up(server, tmp_path):
+    with pytest.raises(ValueError, match="SHA-256 mismatch"):
+        download_file(
+            server.url,
+            tmp_path / "model.gguf",
+            sha256="0" * 64,
+            segment_size=SEGMENT_SIZE,
+        )
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_without_range_support(server, tmp_path):
+    server.ranges = False
+
+    dest = download_file(
+        server.url, tmp_path / "model.gguf", sha256=SHA256, segment_size=SEGMENT_SIZE
+    )
+
+    assert dest.read_bytes() == DATA
+    assert ranges_requested(server) == [None]
+    assert sorted(os.listdir(tmp_path)) == ["model.gguf"]
+
+
+def test_download_stops_on_first_failed_segment(server, tmp_path):
+    # Segment 0 is still in flight when segment 1 fails; the remaining queued
+    # segments must not be fetched while waiting for it
+    server.delays["bytes=0-4999"] = 1
+    server.fail_ranges.add("bytes=5000-9999")
+    session = requests.Session()  # no retries, so the 500 surfaces at once
+
+    with pytest.raises(requests.HTTPError):
+        download_file(
+            server.url,
+            tmp_path / "model.gguf",
+            sha256=SHA256,
+            max_workers=2,
+            segment_size=SEGMENT_SIZE // 10,
+            session=session,
+        )
+
+    # Segment 0, the failed segment 1 and at most the one the freed worker
+    # picked up before the failure was noticed
+    assert len(server.requested) <= 3
+    assert not (tmp_path / "model.gguf").exists()
@@ -0,0 +1,145 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from chata3d3.rag.sharded_retriever import (
+    ShardedRetriever,
+    load_shard_stores,
+    shard_collection_name,
+)
+
+
+class FakeEmbeddings(Embeddings):
+    """Embed a text as the vector stored in `VECTORS`, keyed by the text."""
+
+    def __init__(self):
+        self.embedded_documents = 0
+
+    def embed_query(self, text):
+        return VECTORS.get(text, [1.0, 0.0])
+
+    def embed_documents(self, texts):
+        self.embedded_documents += len(texts)
+        return [VECTORS.get(text, [1.0, 0.0]) for text in texts]
+
+
+class FakeStore(VectorStore):
+    """Return fixed (text, score) hits, best first, for any query vector."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.calls = 0
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        self.calls += 1
+        return [(Document(page_content=text), score) for text, score in self.hits][:k]
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+    def similarity_search(self, query, k=4, **kwargs):
+        raise NotImplementedError
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+
+# "a1" and "a1-dup" are the same direction, so MMR keeps only one of them
+VECTORS = {
+    "a1": [1.0, 0.0],
+    "a1-dup": [1.0, 0.0],
+    "a2": [0.6, 0.8],
+    "b1": [0.8, 0.6],
+    "b2": [0.0, 1.0],
+}
+
+
+@pytest.fixture
+def stores():
+    return {
+        "papers": FakeStore([("a1", 0.95), ("a1-dup", 0.94), ("a2", 0.6)]),
+        "web": FakeStore([("b1", 0.8), ("b2", 0.1)]),
+    }
+
+
+def retrieve(stores, **kwargs):
+    retriever = ShardedRetriever(
+        vector_stores=stores, embedding=FakeEmbeddings(), **kwargs
+    )
+    return retriever.invoke("a1")
+
+
+def test_merges_shards_by_score(stores):
+    docs = retrieve(stores, k=3, lambda_mult=1.0)
+
+    assert [d.page_content for d in docs] == ["a1", "a1-dup", "b1"]
+    assert [d.metadata["shard"] for d in docs] == ["papers", "papers", "web"]
+    assert [d.metadata["score"] for d in docs] == [0.95, 0.94, 0.8]
+
+
+def test_mmr_skips_near_duplicates(stores):
+    docs = retrieve(stores, k=2, lambda_mult=0.25)
+
+    contents = [d.page_content for d in docs]
+    assert contents[0] == "a1"
+    assert "a1-dup" not in contents
+
+
+def test_fetch_k_limits_merged_candidates(stores):
+    docs = retrieve(stores, k=3, fetch_k=2, lambda_mult=1.0)
+
+    assert [d.page_content for d in docs] == ["a1", "a1-dup"]
+
+
+@pytest.mark.parametrize("shards", [None, []])
+def test_empty_selection_searches_every_shard(stores, shards):
+    retrieve(stores, shards=shards)
+
+    assert stores["papers"].calls == 1
+    assert stores["web"].calls == 1
+
+
+def test_selection_restricts_shards(stores):
+    docs = retrieve(stores, shards=["web"])
+
+    assert {d.metadata["shard"] for d in docs} == {"web"}
+    assert stores["papers"].calls == 0
+
+
+def test_unknown_shard_raises(stores):
+    with pytest.raises(ValueError, match="Unknown shards"):
+        retrieve(stores, shards=["web", "nope"])
+
+
+def test_no_shards_raises():
+    with pytest.raises(ValueError, match="No shards"):
+        retrieve({})
+
+
+def test_qdrant_shards_use_stored_vectors():
+    embedding = FakeEmbeddings()
+    client = QdrantClient(":memory:")
+    for shard, texts in {"papers": ["a1", "a1-dup", "a2"], "web": ["b1", "b2"]}.items():
+        client.create_collection(
+            shard_collection_name(shard),
+            vectors_config=VectorParams(size=2, distance=Distance.COSINE),
+        )
+        load_shard_stores(client, embedding)[shard].add_texts(texts)
+    stores = load_shard_stores(client, embedding)
+    embedding.embedded_documents = 0
+
+    retriever = ShardedRetriever(
+        vector_stores=stores,
+        embedding=embedding,
+        k=2,
+        lambda_mult=0.25,
+    )
+    contents = [d.page_content for d in retriever.invoke("a1")]
+
+    assert contents[0] in {"a1", "a1-dup"}
+    assert not {"a1", "a1-dup"} <= set(contents)
+    assert embedding.embedded_documents == 0